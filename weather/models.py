@@ -2,7 +2,7 @@
 Data models for weather information.
 """
 
-from typing import Optional
+from typing import List, Optional
 
 
 class WeatherData:
@@ -64,3 +64,23 @@ class MoonPhaseData:
         if self.icon:
             return f"{self.icon} {self.phase} ({self.illumination}% Illuminated)"
         return f"{self.phase} ({self.illumination}% Illuminated)"
+
+
+class ForecastPoint:
+    """A single time step of a structured forecast"""
+
+    def __init__(
+        self, time: str, temperature: float, precipitation_chance: int = None
+    ):
+        self.time = time
+        self.temperature = temperature
+        self.precipitation_chance = precipitation_chance
+
+
+class ForecastData:
+    """Class to standardize structured forecast data across providers"""
+
+    def __init__(self, location: str, unit: str, points: List[ForecastPoint]):
+        self.location = location
+        self.unit = unit
+        self.points = points
@@ -2,8 +2,14 @@
 Weather provider implementations for the maubot-weather plugin.
 """
 
-from .base import WeatherProvider
+from .base import LocationNotFoundError, WeatherProvider, WeatherProviderError
 from .wttr_in import WttrInProvider
 from .test import TestProvider
 
-__all__ = ["WeatherProvider", "WttrInProvider", "TestProvider"]
+__all__ = [
+    "WeatherProvider",
+    "WeatherProviderError",
+    "LocationNotFoundError",
+    "WttrInProvider",
+    "TestProvider",
+]
@@ -5,7 +5,15 @@ Abstract base class for weather providers.
 from abc import ABC, abstractmethod
 from typing import Optional
 
-from ..models import WeatherData, MoonPhaseData
+from ..models import ForecastData, WeatherData, MoonPhaseData
+
+
+class WeatherProviderError(Exception):
+    """Raised when a provider cannot return weather data"""
+
+
+class LocationNotFoundError(WeatherProviderError):
+    """Raised when a provider does not recognise the requested location"""
 
 
 class WeatherProvider(ABC):
@@ -22,11 +30,30 @@ class WeatherProvider(ABC):
         """Whether this provider supports weather images"""
         return False
 
+    @property
+    def supports_forecast(self) -> bool:
+        """Whether this provider supports structured forecast data"""
+        return False
+
+    def cache_status(
+        self, location: str, units: str = None, language: str = None, forecast: bool = False
+    ) -> str:
+        """Describe how a weather (or forecast) lookup would be served, for tracing"""
+        return "uncached"
+
     @abstractmethod
     async def get_weather(
-        self, location: str, units: str = None, language: str = None
+        self,
+        location: str,
+        units: str = None,
+        language: str = None,
+        show_plus_sign: bool = False,
+        prefetch_forecast: bool = False,
     ) -> WeatherData:
-        """Get weather data for a location"""
+        """Get weather data for a location. With `prefetch_forecast`, providers
+        may fetch the structured forecast in the same request so a following
+        get_forecast is answered locally.
+        """
         pass
 
     @abstractmethod
@@ -36,6 +63,12 @@ class WeatherProvider(ABC):
         """Get weather image for a location, return None if not supported"""
         pass
 
+    async def get_forecast(
+        self, location: str, units: str = None, language: str = None
+    ) -> Optional[ForecastData]:
+        """Get structured forecast data for a location, return None if not supported"""
+        return None
+
     @abstractmethod
     async def get_moon_phase(self) -> MoonPhaseData:
         """Get current moon phase data"""
@@ -1,18 +1,49 @@
 """
 Mock weather provider for testing purposes.
+
+Besides returning canned data, the provider can simulate an upstream service:
+per-endpoint latency, error rates and timeouts, plus optional image bytes, all
+driven by the ``test_provider`` section of the config. Seeding the random
+number generator makes a run reproducible.
 """
 
-from typing import Optional
+import asyncio
+import math
+import random
+from typing import Any, Dict, Optional
 
-from .base import WeatherProvider
+from .base import WeatherProvider, WeatherProviderError
+from ..models import ForecastData, ForecastPoint
+from ..render import encode_png
 from ..weather import WeatherData, MoonPhaseData
 
 
 class TestProvider(WeatherProvider):
     """Mock weather provider for testing purposes"""
 
-    def __init__(self, http_client):
+    endpoints = ("weather", "forecast", "image", "moon")
+    distributions = ("fixed", "uniform", "normal", "exponential")
+
+    def __init__(self, http_client, settings: Dict[str, Any] = None):
         self.http = http_client
+        settings = settings or {}
+        self._random = random.Random(settings.get("seed"))
+        # Image filler gets its own generator so changing image_size doesn't
+        # shift the latency and error draws of a seeded run
+        self._image_random = random.Random(settings.get("seed"))
+        self._image_size = int(settings.get("image_size") or 0)
+        # Copy the settings so later config edits only apply once the
+        # provider is rebuilt, rather than half-way through a run
+        self._endpoints = {
+            endpoint: dict(settings.get(endpoint) or {}) for endpoint in self.endpoints
+        }
+        for endpoint, endpoint_settings in self._endpoints.items():
+            distribution = endpoint_settings.get("latency") or "fixed"
+            if distribution not in self.distributions:
+                raise ValueError(
+                    f"Unknown latency distribution '{distribution}' for test provider "
+                    f"endpoint '{endpoint}'. Valid values: {', '.join(self.distributions)}"
+                )
 
     @property
     def name(self) -> str:
@@ -20,12 +51,68 @@ class TestProvider(WeatherProvider):
 
     @property
     def supports_images(self) -> bool:
-        return False
+        return self._image_size > 0
+
+    @property
+    def supports_forecast(self) -> bool:
+        return True
+
+    def _sample_latency(self, settings: Dict[str, Any]) -> float:
+        """Draw a latency in milliseconds from the configured distribution"""
+        distribution = settings.get("latency") or "fixed"
+        mean = float(settings.get("latency_ms") or 0)
+        jitter = float(settings.get("latency_jitter_ms") or 0)
+        if distribution == "uniform":
+            latency = self._random.uniform(mean - jitter, mean + jitter)
+        elif distribution == "normal":
+            latency = self._random.gauss(mean, jitter)
+        elif distribution == "exponential":
+            latency = self._random.expovariate(1 / mean) if mean > 0 else 0.0
+        else:  # fixed; other values are rejected in __init__
+            latency = mean
+        return max(latency, 0.0)
+
+    async def _simulate(self, endpoint: str) -> None:
+        """Apply the configured latency, timeout and error rate for an endpoint"""
+        settings = self._endpoints[endpoint]
+        # Draw everything up front so each call consumes the same random
+        # numbers regardless of its outcome, keeping seeded runs reproducible
+        latency = self._sample_latency(settings)
+        failed = self._random.random() < float(settings.get("error_rate") or 0)
+        timeout = float(settings.get("timeout_ms") or 0)
+
+        if timeout and latency > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise asyncio.TimeoutError(
+                f"Simulated {endpoint} timeout after {timeout:g} ms"
+            )
+        if latency:
+            await asyncio.sleep(latency / 1000)
+        if failed:
+            raise WeatherProviderError(f"Simulated {endpoint} error")
+
+    def _build_image(self) -> bytes:
+        """Build a valid 1x1 PNG padded to the configured size"""
+        image = encode_png(1, 1, [b"\x00"])
+        # An empty chunk costs 12 bytes; lower-case chunk names are ancillary
+        # and ignored by decoders, so the padding doesn't affect the image
+        padding = self._image_size - len(image) - 12
+        if padding < 0:
+            return image
+        filler = self._image_random.randbytes(padding)
+        return encode_png(1, 1, [b"\x00"], extra_chunks=[(b"teSt", filler)])
 
     async def get_weather(
-        self, location: str, units: str = None, language: str = None, show_plus_sign: bool = False
+        self,
+        location: str,
+        units: str = None,
+        language: str = None,
+        show_plus_sign: bool = False,
+        prefetch_forecast: bool = False,
     ) -> WeatherData:
         """Return fake weather data for testing"""
+        await self._simulate("weather")
+
         # Generate some simple test data
         temp_unit = "°F" if units == "u" else "°C"
         temperature = f"72{temp_unit}" if units == "u" else f"22{temp_unit}"
@@ -48,9 +135,32 @@ class TestProvider(WeatherProvider):
     async def get_weather_image(
         self, location: str, units: str = None, language: str = None
     ) -> Optional[bytes]:
-        """Test provider doesn't support images"""
-        return None
+        """Return a generated PNG of the configured size, or None if disabled"""
+        if not self.supports_images:
+            return None
+        await self._simulate("image")
+        return self._build_image()
+
+    async def get_forecast(
+        self, location: str, units: str = None, language: str = None
+    ) -> Optional[ForecastData]:
+        """Return three days of fake three-hourly forecast data"""
+        await self._simulate("forecast")
+        points = []
+        for step in range(24):
+            celsius = 18 + 6 * math.sin((step % 8 - 3) * math.pi / 4)
+            points.append(
+                ForecastPoint(
+                    time=f"day {step // 8 + 1} {step % 8 * 3:02d}:00",
+                    temperature=round(celsius * 9 / 5 + 32 if units == "u" else celsius),
+                    precipitation_chance=step * 4 % 100,
+                )
+            )
+        return ForecastData(
+            location="TestCity", unit="°F" if units == "u" else "°C", points=points
+        )
 
     async def get_moon_phase(self) -> MoonPhaseData:
         """Return fake moon phase data for testing"""
+        await self._simulate("moon")
         return MoonPhaseData(phase="Test Moon", illumination="42", icon="🌔")
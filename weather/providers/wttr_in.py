@@ -2,22 +2,90 @@
 Weather provider implementation for wttr.in
 """
 
+from json import loads
 from re import search, sub
-from typing import Dict, Optional, Union
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple, Type, Union
 from urllib.parse import urlencode
 
 from yarl import URL
 
-from .base import WeatherProvider
+from .base import LocationNotFoundError, WeatherProvider, WeatherProviderError
+from ..models import ForecastData, ForecastPoint
 from ..weather import WeatherData, MoonPhaseData
 
 
 class WttrInProvider(WeatherProvider):
     """Weather provider implementation for wttr.in"""
 
-    def __init__(self, http_client):
+    # Upper bound on entries in each cache so a flood of distinct queries
+    # can't grow memory without limit
+    _cache_size = 256
+
+    # wttr.in weather codes and the symbols its one-line format shows for
+    # them, used when the reply is built from j1 data for local rendering
+    _weather_symbols = {
+        "113": "☀️",
+        "116": "⛅️",
+        "119": "☁️",
+        "122": "☁️",
+        "143": "🌫",
+        "176": "🌦",
+        "179": "🌧",
+        "182": "🌧",
+        "185": "🌧",
+        "200": "⛈",
+        "227": "🌨",
+        "230": "❄️",
+        "248": "🌫",
+        "260": "🌫",
+        "263": "🌦",
+        "266": "🌦",
+        "281": "🌧",
+        "284": "🌧",
+        "293": "🌦",
+        "296": "🌦",
+        "299": "🌧",
+        "302": "🌧",
+        "305": "🌧",
+        "308": "🌧",
+        "311": "🌧",
+        "314": "🌧",
+        "317": "🌧",
+        "320": "🌨",
+        "323": "🌨",
+        "326": "🌨",
+        "329": "❄️",
+        "332": "❄️",
+        "335": "❄️",
+        "338": "❄️",
+        "350": "🌧",
+        "353": "🌦",
+        "356": "🌧",
+        "359": "🌧",
+        "362": "🌧",
+        "365": "🌧",
+        "368": "🌨",
+        "371": "❄️",
+        "374": "🌧",
+        "377": "🌧",
+        "386": "⛈",
+        "389": "🌩",
+        "392": "⛈",
+        "395": "❄️",
+    }
+
+    def __init__(
+        self, http_client, negative_cache_ttl: int = 60, forecast_cache_ttl: int = 900
+    ):
         self.http = http_client
         self._service_url = "https://wttr.in"
+        self._negative_cache_ttl = negative_cache_ttl
+        self._negative_cache: Dict[
+            Tuple[str, str], Tuple[float, Type[WeatherProviderError], str]
+        ] = {}
+        self._forecast_cache_ttl = forecast_cache_ttl
+        self._forecast_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
 
     @property
     def name(self) -> str:
@@ -27,6 +95,10 @@ class WttrInProvider(WeatherProvider):
     def supports_images(self) -> bool:
         return True
 
+    @property
+    def supports_forecast(self) -> bool:
+        return True
+
     def _build_url(
         self, location: str, options: Dict[str, Union[int, str]] = None
     ) -> URL:
@@ -38,10 +110,160 @@ class WttrInProvider(WeatherProvider):
         querystring = sub(r"=(?:(?=&)|$)", "", urlencode(options))
         return base_url.update_query(querystring)
 
+    @staticmethod
+    def _forecast_cache_key(location: str, language: str = None) -> Tuple[str, str]:
+        """Key for a j1 document; it carries metric and US values, so units aren't part of it"""
+        return (location.lower(), language or "")
+
+    @classmethod
+    def _make_room(cls, cache: Dict[Any, Tuple[Any, ...]]) -> None:
+        """Drop expired entries, then the oldest ones until there is space for one more"""
+        now = monotonic()
+        for key in [k for k, v in cache.items() if v[0] <= now]:
+            del cache[key]
+        while len(cache) >= cls._cache_size:
+            # dicts keep insertion order, so this evicts the oldest entry
+            del cache[next(iter(cache))]
+
+    @staticmethod
+    def _classify_error(
+        status: int, content: str, location: str
+    ) -> Optional[WeatherProviderError]:
+        """Return the error described by a wttr.in response, or None if it is usable"""
+        # wttr.in answers unknown locations with a plain-text notice, and not
+        # always with a 404 status
+        if "unknown location" in content.lower():
+            return LocationNotFoundError(f"Unknown location: {location}")
+        if status != 200:
+            return WeatherProviderError(f"wttr.in returned HTTP {status}")
+        return None
+
+    def _get_cached_error(
+        self, cache_key: Tuple[str, str]
+    ) -> Optional[WeatherProviderError]:
+        """Return a fresh copy of a cached failure, dropping it once expired"""
+        cached = self._negative_cache.get(cache_key)
+        if not cached:
+            return None
+        expires, error_class, message = cached
+        if expires <= monotonic():
+            del self._negative_cache[cache_key]
+            return None
+        return error_class(message)
+
+    def _cache_error(
+        self, cache_key: Tuple[str, str], error: WeatherProviderError
+    ) -> None:
+        """Remember a failed lookup for the negative cache TTL"""
+        # A broken document must not keep being served from the forecast cache
+        self._forecast_cache.pop(cache_key, None)
+        if self._negative_cache_ttl <= 0:
+            return
+        self._make_room(self._negative_cache)
+        self._negative_cache[cache_key] = (
+            monotonic() + self._negative_cache_ttl,
+            type(error),
+            str(error),
+        )
+
+    def cache_status(
+        self, location: str, units: str = None, language: str = None, forecast: bool = False
+    ) -> str:
+        now = monotonic()
+        cache_key = self._forecast_cache_key(location, language)
+        # Mirrors the lookup order of _get_forecast_json; current weather is
+        # always refetched, so only the negative cache can answer it
+        cached = self._forecast_cache.get(cache_key)
+        if forecast and cached and cached[0] > now:
+            return "forecast cache hit"
+        negative = self._negative_cache.get(cache_key)
+        if negative and negative[0] > now:
+            return "negative cache hit"
+        return "cache miss"
+
+    async def _get_forecast_json(
+        self, location: str, language: str = None, use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Fetch the j1 document for a location and cache it for get_forecast"""
+        cache_key = self._forecast_cache_key(location, language)
+        cached = self._forecast_cache.get(cache_key)
+        if use_cache and cached and cached[0] > monotonic():
+            return cached[1]
+
+        cached_error = self._get_cached_error(cache_key)
+        if cached_error:
+            raise cached_error
+
+        options = {"format": "j1"}
+        if language:
+            options["lang"] = language
+        response = await self.http.get(self._build_url(location, options))
+        content = await response.text()
+
+        error = self._classify_error(response.status, content, location)
+        if error:
+            self._cache_error(cache_key, error)
+            raise error
+
+        try:
+            forecast_json = loads(content)
+        except ValueError:
+            error = WeatherProviderError("wttr.in returned an unreadable response")
+            self._cache_error(cache_key, error)
+            raise error from None
+
+        if self._forecast_cache_ttl > 0:
+            self._make_room(self._forecast_cache)
+            self._forecast_cache[cache_key] = (
+                monotonic() + self._forecast_cache_ttl,
+                forecast_json,
+            )
+        return forecast_json
+
+    def _malformed(self, location: str, language: str = None) -> WeatherProviderError:
+        """Cache and return the error for a j1 document missing expected fields"""
+        error = WeatherProviderError("wttr.in returned an incomplete response")
+        self._cache_error(self._forecast_cache_key(location, language), error)
+        return error
+
+    @staticmethod
+    def _area_name(forecast_json: Dict[str, Any], location: str) -> str:
+        """Name of the area wttr.in resolved the location to"""
+        try:
+            return forecast_json["nearest_area"][0]["areaName"][0]["value"]
+        except (KeyError, IndexError, TypeError):
+            return location
+
+    @staticmethod
+    def _uses_us_units(forecast_json: Dict[str, Any], units: str = None) -> bool:
+        """Whether to report in °F, matching wttr.in's choice when units aren't given"""
+        if units:
+            return units == "u"
+        try:
+            country = forecast_json["nearest_area"][0]["country"][0]["value"]
+        except (KeyError, IndexError, TypeError):
+            return False
+        return country == "United States of America"
+
     async def get_weather(
-        self, location: str, units: str = None, language: str = None, show_plus_sign: bool = False
+        self,
+        location: str,
+        units: str = None,
+        language: str = None,
+        show_plus_sign: bool = False,
+        prefetch_forecast: bool = False,
     ) -> WeatherData:
         """Get weather data from wttr.in"""
+        if prefetch_forecast:
+            return await self._get_weather_from_forecast(
+                location, units, language, show_plus_sign
+            )
+
+        cache_key = self._forecast_cache_key(location, language)
+        cached_error = self._get_cached_error(cache_key)
+        if cached_error:
+            raise cached_error
+
         options = {}
         if language:
             options["lang"] = language
@@ -56,6 +278,11 @@ class WttrInProvider(WeatherProvider):
         response = await self.http.get(url)
         content = await response.text()
 
+        error = self._classify_error(response.status, content, location)
+        if error:
+            self._cache_error(cache_key, error)
+            raise error
+
         # Parse the response from wttr.in
         location_match = search(r"^(.+):", content)
         extracted_location = location_match.group(1) if location_match else location
@@ -91,6 +318,41 @@ class WttrInProvider(WeatherProvider):
             provider_link=provider_link,
         )
 
+    async def _get_weather_from_forecast(
+        self, location: str, units: str, language: str, show_plus_sign: bool
+    ) -> WeatherData:
+        """Build the one-line reply from a fresh j1 document and keep the
+        document cached, so the forecast image that follows needs no request
+        """
+        forecast_json = await self._get_forecast_json(location, language, use_cache=False)
+
+        try:
+            current = forecast_json["current_condition"][0]
+            if self._uses_us_units(forecast_json, units):
+                temperature, unit = int(current["temp_F"]), "°F"
+            else:
+                temperature, unit = int(current["temp_C"]), "°C"
+            symbol = self._weather_symbols.get(current.get("weatherCode"), "✨")
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise self._malformed(location, language) from None
+
+        # Same shape as format=3: symbol and temperature, "+" only if asked
+        sign = "+" if show_plus_sign and temperature > 0 else ""
+
+        options = {}
+        if language:
+            options["lang"] = language
+        if units:
+            options[units] = ""
+        provider_link = str(self._build_url(location, options))
+
+        return WeatherData(
+            location=location or self._area_name(forecast_json, location),
+            temperature="",  # combined with the condition, as in format=3
+            condition=f"{symbol} {sign}{temperature}{unit}",
+            provider_link=provider_link,
+        )
+
     async def get_weather_image(
         self, location: str, units: str = None, language: str = None
     ) -> Optional[bytes]:
@@ -108,6 +370,33 @@ class WttrInProvider(WeatherProvider):
             return await response.read()
         return None
 
+    async def get_forecast(
+        self, location: str, units: str = None, language: str = None
+    ) -> Optional[ForecastData]:
+        """Get the hourly forecast for the coming days from wttr.in"""
+        forecast_json = await self._get_forecast_json(location, language)
+        us_units = self._uses_us_units(forecast_json, units)
+        temp_key = "tempF" if us_units else "tempC"
+
+        try:
+            points = [
+                ForecastPoint(
+                    time=f"{day['date']} {int(hour['time']) // 100:02d}:00",
+                    temperature=float(hour[temp_key]),
+                    precipitation_chance=int(hour.get("chanceofrain", 0)),
+                )
+                for day in forecast_json.get("weather", [])
+                for hour in day.get("hourly", [])
+            ]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise self._malformed(location, language) from None
+
+        return ForecastData(
+            location=self._area_name(forecast_json, location),
+            unit="°F" if us_units else "°C",
+            points=points,
+        )
+
     async def get_moon_phase(self) -> MoonPhaseData:
         """Get moon phase data from wttr.in"""
         # Associate the utf-8 character with the name of the phase
@@ -0,0 +1,216 @@
+"""
+Render forecast charts locally from structured forecast data.
+
+The chart is drawn into a small palette image and encoded as PNG with only the
+standard library, so no imaging dependency is needed and the result is a
+fraction of the size of the images served by wttr.in.
+"""
+
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import ForecastData
+
+# Palette indices
+BACKGROUND = 0
+GRID = 1
+TEXT = 2
+TEMPERATURE = 3
+PRECIPITATION = 4
+
+PALETTE = [
+    (255, 255, 255),
+    (225, 225, 225),
+    (80, 80, 80),
+    (220, 60, 40),
+    (140, 180, 230),
+]
+
+# 3x5 bitmap glyphs for the labels
+GLYPHS: Dict[str, List[str]] = {
+    "0": ["111", "101", "101", "101", "111"],
+    "1": ["010", "110", "010", "010", "111"],
+    "2": ["111", "001", "111", "100", "111"],
+    "3": ["111", "001", "111", "001", "111"],
+    "4": ["101", "101", "111", "001", "001"],
+    "5": ["111", "100", "111", "001", "111"],
+    "6": ["111", "100", "111", "101", "111"],
+    "7": ["111", "001", "010", "010", "010"],
+    "8": ["111", "101", "111", "101", "111"],
+    "9": ["111", "101", "111", "001", "111"],
+    "-": ["000", "000", "111", "000", "000"],
+    "°": ["111", "101", "111", "000", "000"],
+    "C": ["111", "100", "100", "100", "111"],
+    "F": ["111", "100", "110", "100", "100"],
+    "%": ["101", "001", "010", "100", "101"],
+    "A": ["010", "101", "111", "101", "101"],
+    "I": ["111", "010", "010", "010", "111"],
+    "N": ["101", "111", "111", "111", "101"],
+    "R": ["110", "101", "110", "101", "101"],
+}
+
+SCALE = 2
+STEP = 12
+MARGIN_LEFT = 44
+MARGIN_RIGHT = 8
+MARGIN_TOP = 8
+PLOT_HEIGHT = 96
+# Room below the plot for the day of month labels
+MARGIN_BOTTOM = 5 * SCALE + 6
+HEIGHT = MARGIN_TOP + PLOT_HEIGHT + MARGIN_BOTTOM
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    """Encode one length-prefixed, CRC-suffixed PNG chunk"""
+    body = kind + data
+    return (
+        struct.pack(">I", len(data))
+        + body
+        + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(
+    width: int,
+    height: int,
+    rows: Iterable[bytes],
+    palette: Optional[Sequence[Tuple[int, int, int]]] = None,
+    extra_chunks: Iterable[Tuple[bytes, bytes]] = (),
+) -> bytes:
+    """Encode 8-bit rows as PNG, using palette indices if a palette is given
+    and greyscale otherwise. `extra_chunks` are written before the image data.
+    """
+    color_type = 3 if palette else 0
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    chunks = [_png_chunk(b"IHDR", header)]
+    if palette:
+        chunks.append(_png_chunk(b"PLTE", b"".join(bytes(color) for color in palette)))
+    chunks.extend(_png_chunk(kind, data) for kind, data in extra_chunks)
+    # Each scanline is prefixed with filter type 0 (none)
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    chunks.append(_png_chunk(b"IDAT", zlib.compress(raw, 9)))
+    chunks.append(_png_chunk(b"IEND", b""))
+    return b"\x89PNG\r\n\x1a\n" + b"".join(chunks)
+
+
+class _Canvas:
+    """A fixed-size palette image"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.pixels = [bytearray(width) for _ in range(height)]
+
+    def set(self, x: int, y: int, color: int) -> None:
+        """Colour one pixel, ignoring coordinates outside the canvas"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y][x] = color
+
+    def rect(self, x0: int, y0: int, x1: int, y1: int, color: int) -> None:
+        """Fill the rectangle from (x0, y0) up to, not including, (x1, y1)"""
+        for y in range(max(y0, 0), min(y1, self.height)):
+            for x in range(max(x0, 0), min(x1, self.width)):
+                self.pixels[y][x] = color
+
+    def line(self, x0: int, y0: int, x1: int, y1: int, color: int) -> None:
+        """Draw a two pixel thick line (Bresenham)"""
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+        err = dx + dy
+        while True:
+            self.set(x0, y0, color)
+            self.set(x0, y0 + 1, color)
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, x: int, y: int, text: str, color: int, scale: int = SCALE) -> None:
+        """Draw text with the bitmap font, skipping characters it lacks"""
+        for char in text:
+            glyph = GLYPHS.get(char)
+            if glyph:
+                for row, bits in enumerate(glyph):
+                    for col, bit in enumerate(bits):
+                        if bit == "1":
+                            self.rect(
+                                x + col * scale,
+                                y + row * scale,
+                                x + (col + 1) * scale,
+                                y + (row + 1) * scale,
+                                color,
+                            )
+            x += 4 * scale
+
+    def to_png(self) -> bytes:
+        """Encode the canvas as a palette PNG"""
+        return encode_png(self.width, self.height, self.pixels, palette=PALETTE)
+
+
+def render_forecast_png(forecast: ForecastData) -> bytes:
+    """Render a temperature and precipitation chart for a forecast as PNG.
+
+    This is CPU bound, so call it from a thread pool rather than the event loop.
+    """
+    points = forecast.points
+    width = MARGIN_LEFT + max(len(points), 1) * STEP + MARGIN_RIGHT
+    canvas = _Canvas(width, HEIGHT)
+    top, bottom = MARGIN_TOP, MARGIN_TOP + PLOT_HEIGHT
+
+    for y in (top, (top + bottom) // 2, bottom - 1):
+        canvas.rect(MARGIN_LEFT, y, width - MARGIN_RIGHT, y + 1, GRID)
+    if not points:
+        return canvas.to_png()
+
+    temperatures = [point.temperature for point in points]
+    low, high = min(temperatures), max(temperatures)
+    spread = (high - low) or 1
+
+    def x_of(index: int) -> int:
+        return MARGIN_LEFT + index * STEP + STEP // 2
+
+    def y_of(temperature: float) -> int:
+        # Leave room below the line for the precipitation bars
+        return top + round((high - temperature) / spread * (PLOT_HEIGHT * 0.6))
+
+    previous_day = None
+    for index, point in enumerate(points):
+        day = point.time.rsplit(" ", 1)[0]
+        if day != previous_day:
+            separator = MARGIN_LEFT + index * STEP
+            if previous_day is not None:
+                for y in range(top, bottom, 4):
+                    canvas.rect(separator, y, separator + 1, y + 2, TEXT)
+            # Label each day with its day of month ("2025-04-25" -> "25")
+            canvas.text(separator + 2, bottom + 4, day.replace(" ", "-").split("-")[-1], TEXT)
+        previous_day = day
+        if point.precipitation_chance:
+            bar = round(point.precipitation_chance / 100 * PLOT_HEIGHT * 0.35)
+            canvas.rect(x_of(index) - 3, bottom - bar, x_of(index) + 3, bottom, PRECIPITATION)
+            label = str(point.precipitation_chance)
+            canvas.text(x_of(index) - (len(label) * 4 - 1) // 2, bottom - bar - 6, label, TEXT, scale=1)
+
+    for index in range(1, len(points)):
+        canvas.line(
+            x_of(index - 1),
+            y_of(temperatures[index - 1]),
+            x_of(index),
+            y_of(temperatures[index]),
+            TEMPERATURE,
+        )
+
+    unit = forecast.unit or ""
+    canvas.text(2, y_of(high), f"{round(high)}{unit}", TEXT)
+    if round(low) != round(high):
+        canvas.text(2, y_of(low) - 5 * SCALE, f"{round(low)}{unit}", TEXT)
+
+    # Legend: the bars are the chance of rain in percent
+    canvas.rect(2, bottom - 5, 5, bottom, PRECIPITATION)
+    canvas.text(7, bottom - 5, "RAIN%", TEXT, scale=1)
+    return canvas.to_png()
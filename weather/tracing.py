@@ -0,0 +1,43 @@
+"""
+Per-stage timing of a single command invocation.
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator, List, Tuple
+
+
+class RequestTrace:
+    """Collects how long each stage of handling a request took"""
+
+    def __init__(self):
+        self._start = perf_counter()
+        self.stages: List[Tuple[str, float, str]] = []
+
+    @contextmanager
+    def stage(self, name: str, note: str = "") -> Iterator[None]:
+        """Time the enclosed block and record it under `name`"""
+        start = perf_counter()
+        try:
+            yield
+        except Exception:
+            note = f"{note}, failed" if note else "failed"
+            raise
+        finally:
+            self.stages.append((name, (perf_counter() - start) * 1000, note))
+
+    @property
+    def total_ms(self) -> float:
+        """Milliseconds since the trace was started"""
+        return (perf_counter() - self._start) * 1000
+
+    def format(self, separator: str = "\n") -> str:
+        """Return the timing breakdown, one stage per entry"""
+        entries = []
+        for name, elapsed, note in self.stages:
+            entry = f"{name}: {elapsed:.1f} ms"
+            if note:
+                entry += f" ({note})"
+            entries.append(entry)
+        entries.append(f"total: {self.total_ms:.1f} ms")
+        return separator.join(entries)
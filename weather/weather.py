@@ -2,6 +2,8 @@
 Maubot to get weather from multiple providers and post in matrix chat
 """
 
+import asyncio
+from random import random
 from re import IGNORECASE, Match, search, sub
 from typing import Dict, List, Optional, Protocol, Type, Union
 
@@ -11,6 +13,8 @@ from mautrix.util.config import BaseProxyConfig, ConfigUpdateHelper
 
 from .models import WeatherData, MoonPhaseData
 from .providers import WeatherProvider, WttrInProvider, TestProvider
+from .render import render_forecast_png
+from .tracing import RequestTrace
 from .userprefs import UserPreferencesManager
 
 
@@ -28,6 +32,15 @@ class Config(BaseProxyConfig):
         helper.copy("default_language")
         helper.copy("weather_provider")
         helper.copy("show_plus_sign")  # Option to show + sign in temperature
+        helper.copy("negative_cache_ttl")
+        helper.copy("render_images_locally")
+        helper.copy("forecast_cache_ttl")
+        helper.copy("trace_sample_percent")
+        helper.copy("test_provider.seed")
+        helper.copy("test_provider.image_size")
+        for endpoint in TestProvider.endpoints:
+            for key in ("latency", "latency_ms", "latency_jitter_ms", "error_rate", "timeout_ms"):
+                helper.copy(f"test_provider.{endpoint}.{key}")
 
 
 class WeatherBot(Plugin):
@@ -43,20 +56,31 @@ class WeatherBot(Plugin):
     async def start(self) -> None:
         await super().start()
         self.config.load_and_update()
+        self._init_providers()
 
-        # Initialize providers
+        # Set up user preferences manager
+        self._userprefs = UserPreferencesManager(self.database, self.log)
+        await self._userprefs.init_db()
+
+    def on_external_config_update(self) -> None:
+        """Reload the config and rebuild providers so their settings apply"""
+        super().on_external_config_update()
+        self._init_providers()
+
+    def _init_providers(self) -> None:
+        """Build the providers from the current config"""
         self._providers = {
-            "wttr.in": WttrInProvider(self.http),
-            "test": TestProvider(self.http),
+            "wttr.in": WttrInProvider(
+                self.http,
+                negative_cache_ttl=self.config.get("negative_cache_ttl", 60),
+                forecast_cache_ttl=self.config.get("forecast_cache_ttl", 900),
+            ),
+            "test": TestProvider(self.http, self.config.get("test_provider", {})),
             # Add more providers as they're implemented
             # "openweathermap": OpenWeatherMapProvider(self.http, api_key),
             # "weatherapi": WeatherAPIProvider(self.http, api_key),
         }
 
-        # Set up user preferences manager
-        self._userprefs = UserPreferencesManager(self.database, self.log)
-        await self._userprefs.init_db()
-
         # Set current provider from config (will be overridden per-user)
         provider_name = self.config.get("weather_provider", "wttr.in")
         self._current_provider = self._providers.get(
@@ -76,10 +100,22 @@ class WeatherBot(Plugin):
     @command.argument("location", pass_raw=True)
     async def weather_handler(self, evt: MessageEvent, location: str) -> None:
         """Listens for `!weather` and returns a message with the weather for the location"""
+        trace = RequestTrace()
+        await self._respond_with_weather(evt, location, trace)
+        # Sample a share of real requests into the log
+        if random() * 100 < float(self.config.get("trace_sample_percent", 0) or 0):
+            self.log.info(f"Weather request trace: {trace.format(separator='; ')}")
+
+    async def _respond_with_weather(
+        self, evt: MessageEvent, location: str, trace: RequestTrace
+    ) -> None:
+        """Look up the weather for a location and respond, timing each stage"""
         self._reset_stored_values()
         user_id = evt.sender
-        prefs = await self._userprefs.load_preferences_with_defaults(user_id, self.config, self._providers)
-        parsed_location = self._parse_location(location or prefs['location'])
+        with trace.stage("prefs load"):
+            prefs = await self._userprefs.load_preferences_with_defaults(user_id, self.config, self._providers)
+        with trace.stage("parse"):
+            parsed_location = self._parse_location(location or prefs['location'])
         # Use per-user or default provider
         provider_name = prefs['provider']
         self._current_provider = self._providers.get(provider_name, self._providers["wttr.in"])
@@ -88,27 +124,49 @@ class WeatherBot(Plugin):
             self._stored_units = prefs['units']
         if not self._stored_language:
             self._stored_language = prefs['language']
+        # When the image will be drawn locally, let the provider fetch the
+        # forecast along with the current weather in a single request
+        prefetch_forecast = bool(
+            prefs['show_image'] and self._render_locally() and parsed_location
+        )
         try:
-            weather_data = await self._current_provider.get_weather(
-                parsed_location,
-                units=self._stored_units,
-                language=self._stored_language,
-                show_plus_sign=prefs.get('show_plus_sign', False),
+            cache_status = self._current_provider.cache_status(
+                parsed_location, units=self._stored_units, language=self._stored_language
             )
+            with trace.stage("provider fetch", cache_status):
+                weather_data = await self._current_provider.get_weather(
+                    parsed_location,
+                    units=self._stored_units,
+                    language=self._stored_language,
+                    show_plus_sign=prefs.get('show_plus_sign', False),
+                    prefetch_forecast=prefetch_forecast,
+                )
             # Remove provider_link if user doesn't want to show it
             if not prefs.get('show_link', False):
                 weather_data.provider_link = None
-            await evt.respond(weather_data.get_formatted_message())
+            with trace.stage("respond"):
+                await evt.respond(weather_data.get_formatted_message())
             # Send weather image if enabled and supported
             if (
                 prefs['show_image']
-                and self._current_provider.supports_images
+                and self._can_send_image()
                 and parsed_location
             ):
-                await self._send_weather_image(evt, parsed_location)
+                await self._send_weather_image(evt, parsed_location, trace)
         except Exception as e:
             await evt.respond(f"Error getting weather: {str(e)}")
 
+    @weather_handler.subcommand("debug", help="Get the weather with a timing breakdown")
+    @command.argument("location", pass_raw=True, required=False)
+    async def debug(self, evt: MessageEvent, location: str = "") -> None:
+        """Run a normal weather lookup and report how long each stage took"""
+        trace = RequestTrace()
+        await self._respond_with_weather(evt, location, trace)
+        await evt.respond(
+            f"Timing breakdown ({self._current_provider.name}):\n\n"
+            + trace.format(separator="\n\n")
+        )
+
     @weather_handler.subcommand("provider", help="Set or view current weather provider")
     @command.argument("provider_name", required=False)
     async def set_provider(self, evt: MessageEvent, provider_name: str = None) -> None:
@@ -161,6 +219,7 @@ class WeatherBot(Plugin):
             "To set your own preferences, use: `!weather pref <option> <value>`\n\n"
             "To view your preferences, use: `!weather pref`\n\n"
             "To clear your preferences, use: `!weather pref clear`\n\n"
+            "To see how long each step of a lookup takes, use: `!weather debug <location>`\n\n"
         )
 
     @command.new(name="moon", help="Get the moon phase")
@@ -217,18 +276,50 @@ class WeatherBot(Plugin):
         self._stored_location = location
         return self._stored_location
 
-    async def _send_weather_image(self, evt: MessageEvent, location: str) -> None:
-        """Send weather image to chat if available"""
-        image_data = await self._current_provider.get_weather_image(
-            location, units=self._stored_units, language=self._stored_language
+    def _render_locally(self) -> bool:
+        """Whether images should be drawn from forecast data instead of downloaded"""
+        return bool(
+            self.config.get("render_images_locally", False)
+            and self._current_provider.supports_forecast
         )
 
+    def _can_send_image(self) -> bool:
+        """Whether the current provider can produce a weather image"""
+        return self._render_locally() or self._current_provider.supports_images
+
+    async def _send_weather_image(
+        self, evt: MessageEvent, location: str, trace: RequestTrace
+    ) -> None:
+        """Send weather image to chat if available"""
+        if self._render_locally():
+            cache_status = self._current_provider.cache_status(
+                location, units=self._stored_units, language=self._stored_language, forecast=True
+            )
+            with trace.stage("image fetch", cache_status):
+                forecast = await self._current_provider.get_forecast(
+                    location, units=self._stored_units, language=self._stored_language
+                )
+            image_data = None
+            if forecast:
+                with trace.stage("image render"):
+                    # Drawing is CPU bound, keep it off the event loop
+                    image_data = await asyncio.get_running_loop().run_in_executor(
+                        None, render_forecast_png, forecast
+                    )
+        else:
+            with trace.stage("image fetch", "download"):
+                image_data = await self._current_provider.get_weather_image(
+                    location, units=self._stored_units, language=self._stored_language
+                )
+
         if image_data:
             filename = f"{location}.png"
-            uri = await self.client.upload_media(
-                image_data, mime_type="image/png", filename=filename
-            )
-            await self.client.send_image(evt.room_id, url=uri, file_name=filename)
+            with trace.stage("upload", f"{len(image_data)} bytes"):
+                uri = await self.client.upload_media(
+                    image_data, mime_type="image/png", filename=filename
+                )
+            with trace.stage("respond image"):
+                await self.client.send_image(evt.room_id, url=uri, file_name=filename)
 
     def _config_value(self, name: str) -> str:
         """Get a configuration value with empty string fallback (legacy)"""